@@ -1,59 +1,338 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, current_app, request, jsonify
 from functools import wraps
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+import queue
 import subprocess
 from flask_cors import CORS
 import logging
 from datetime import datetime
 import os
 import json
-import pyodbc
-import bcrypt
-from dotenv import load_dotenv
-
-# Carregar variáveis de ambiente
-load_dotenv()
-
-# Configuração da aplicação
-app = Flask(__name__)
-CORS(app)
-app.config['JSON_AS_ASCII'] = False
-
-# Configuração de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('api_bi.log'),
-        logging.StreamHandler()
-    ]
-)
+
+# pyodbc, bcrypt e python-dotenv são importados sob demanda: o import do
+# módulo fica leve e o custo só é pago por quem realmente usa (ou pelo aquecimento).
+
 logger = logging.getLogger(__name__)
 
-# Variáveis de ambiente
-BEARER_TOKEN = os.getenv('API_TOKEN', 'seu-token-super-secreto-aqui')
-SERVIDOR_BI  = os.getenv('SERVIDOR_BI', '192.168.0.210')
-TASK_NAME    = os.getenv('TASK_NAME', 'AtualizaBI_TI')
+api = Blueprint('api', __name__)
+
+
+# ============================================
+# Configuração
+# ============================================
+
+# Limite de conexões por worker: cada uma ocupa uma thread no aquecimento
+# e uma sessão no SQL Server
+DB_POOL_MAXIMO = 10
+
+# Timeout de conexão em segundos. Fica abaixo do timeout padrão do gunicorn
+# (30s) para que um banco fora do ar não derrube o worker no aquecimento.
+DB_TIMEOUT_MAXIMO = 20
+
+
+def _nome_seguro(valor):
+    return bool(valor) and all(c.isalnum() or c in '_-. ' for c in valor)
+
+
+def _nome_tarefa_valido(nome):
+    # aceita tarefas em pastas do Agendador (ex.: \Pasta\AtualizaBI_TI), mas
+    # nada que escape das aspas na linha de comando do schtasks — inclusive a
+    # barra final, que junto com a aspa de fechamento viraria \"
+    if not nome or nome.endswith('\\') or '\\\\' in nome:
+        return False
+    return all(c.isalnum() or c in '_-. \\' for c in nome)
+
+
+@dataclass(frozen=True)
+class Configuracao:
+    api_token:          str
+    servidor_bi:        str
+    task_name:          str
+    db_server:          str
+    db_name:            str
+    db_user:            str
+    db_password:        str
+    db_pool_aquecer:    int = 2
+    db_timeout_conexao: int = 5
+    log_arquivo:        str = 'api_bi.log'
+
+    def __post_init__(self):
+        erros = []
+
+        if not self.api_token:
+            erros.append('API_TOKEN não pode ser vazio')
+
+        # servidor e tarefa vão direto para a linha de comando do schtasks
+        if not _nome_seguro(self.servidor_bi):
+            erros.append(f'SERVIDOR_BI inválido: {self.servidor_bi!r}')
+        if not _nome_tarefa_valido(self.task_name):
+            erros.append(f'TASK_NAME inválido: {self.task_name!r}')
+
+        for campo in ('db_server', 'db_name', 'db_user', 'db_password'):
+            if not getattr(self, campo):
+                erros.append(f'{campo.upper()} não definido')
+
+        pool = self.db_pool_aquecer
+        if isinstance(pool, bool) or not isinstance(pool, int) or not 0 <= pool <= DB_POOL_MAXIMO:
+            erros.append(f'DB_POOL_AQUECER deve ser um inteiro entre 0 e {DB_POOL_MAXIMO}: {pool!r}')
+
+        timeout = self.db_timeout_conexao
+        if isinstance(timeout, bool) or not isinstance(timeout, int) or not 1 <= timeout <= DB_TIMEOUT_MAXIMO:
+            erros.append(f'DB_TIMEOUT_CONEXAO deve ser um inteiro entre 1 e {DB_TIMEOUT_MAXIMO}: {timeout!r}')
+
+        if erros:
+            raise ValueError('Configuração inválida: ' + '; '.join(erros))
+
+    @classmethod
+    def do_ambiente(cls):
+        """Lê a configuração do .env / variáveis de ambiente."""
+        from dotenv import load_dotenv
+        load_dotenv()
+
+        inteiros = {}
+        for nome, padrao in (('DB_POOL_AQUECER', '2'), ('DB_TIMEOUT_CONEXAO', '5')):
+            valor = os.getenv(nome, padrao)
+            try:
+                inteiros[nome] = int(valor)
+            except ValueError:
+                raise ValueError(f'Configuração inválida: {nome} deve ser um inteiro: {valor!r}')
+
+        return cls(
+            api_token          = os.getenv('API_TOKEN', 'seu-token-super-secreto-aqui'),
+            servidor_bi        = os.getenv('SERVIDOR_BI', '192.168.0.210'),
+            task_name          = os.getenv('TASK_NAME', 'AtualizaBI_TI'),
+            db_server          = os.getenv('DB_SERVER', ''),
+            db_name            = os.getenv('DB_NAME', ''),
+            db_user            = os.getenv('DB_USER', ''),
+            db_password        = os.getenv('DB_PASSWORD', ''),
+            db_pool_aquecer    = inteiros['DB_POOL_AQUECER'],
+            db_timeout_conexao = inteiros['DB_TIMEOUT_CONEXAO'],
+            log_arquivo        = os.getenv('LOG_ARQUIVO', 'api_bi.log'),
+        )
+
+
+def _config():
+    return current_app.config['BI']
+
 
-DB_SERVER   = os.getenv('DB_SERVER')
-DB_NAME     = os.getenv('DB_NAME')
-DB_USER     = os.getenv('DB_USER')
-DB_PASSWORD = os.getenv('DB_PASSWORD')
+def _configurar_logging(cfg):
+    # Só cria os handlers (e abre o arquivo de log) se o root logger ainda
+    # não estiver configurado, para não vazar arquivos a cada create_app()
+    if logging.getLogger().handlers:
+        return
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(cfg.log_arquivo),
+            logging.StreamHandler()
+        ]
+    )
+
+
+def create_app(config=None):
+    """Cria a aplicação Flask. Sem `config`, lê do .env / ambiente."""
+    if config is None:
+        config = Configuracao.do_ambiente()
+
+    _configurar_logging(config)
+
+    if config.api_token == 'seu-token-super-secreto-aqui':
+        logger.warning('API_TOKEN padrão em uso — defina um token seguro no .env')
+
+    app = Flask(__name__)
+    CORS(app)
+    app.config['JSON_AS_ASCII'] = False
+    app.config['BI'] = config
+    app.extensions['pool_conexoes'] = PoolConexoes(lambda: _conectar(config), config.db_pool_aquecer)
+    app.register_blueprint(api)
+
+    return app
 
 
 # ============================================
 # Conexão com SQL Server
 # ============================================
 
-def get_db_connection():
-    conn_str = (
+def _string_conexao(cfg):
+    return (
         "DRIVER={ODBC Driver 17 for SQL Server};"
-        f"SERVER={DB_SERVER};"
-        f"DATABASE={DB_NAME};"
-        f"UID={DB_USER};"
-        f"PWD={DB_PASSWORD};"
+        f"SERVER={cfg.db_server};"
+        f"DATABASE={cfg.db_name};"
+        f"UID={cfg.db_user};"
+        f"PWD={cfg.db_password};"
         "TrustServerCertificate=yes;"
     )
-    return pyodbc.connect(conn_str)
+
+
+def _conectar(cfg):
+    import pyodbc
+    return pyodbc.connect(_string_conexao(cfg), timeout=cfg.db_timeout_conexao)
+
+
+def _fechar(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class _ConexaoDoPool:
+    """
+    Conexão emprestada do pool: close() fecha os cursores abertos por ela e
+    devolve a conexão ao pool em vez de fechá-la. Fechar os cursores antes
+    de devolver garante que outra thread nunca receba a conexão com um
+    statement ainda aberto.
+    """
+
+    def __init__(self, conn, pool):
+        self._conn     = conn
+        self._pool     = pool
+        self._cursores = []
+
+    def __getattr__(self, nome):
+        return getattr(self._conn, nome)
+
+    def cursor(self):
+        cursor = self._conn.cursor()
+        self._cursores.append(cursor)
+        return cursor
+
+    def close(self):
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        cursores, self._cursores = self._cursores, []
+        for cursor in cursores:
+            _fechar(cursor)
+        self._pool.devolver(conn)
+
+
+class PoolConexoes:
+    """
+    Pool de conexões por processo. Guarda até `tamanho` conexões ociosas;
+    as demais são fechadas ao serem devolvidas. Conexões criadas em outro
+    processo (antes de um fork) nunca são reaproveitadas nem fechadas: o
+    socket ainda pertence ao processo pai, então elas ficam referenciadas
+    em `_herdadas` para que o garbage collector não as desconecte.
+    """
+
+    def __init__(self, conectar, tamanho):
+        self._conectar = conectar
+        self._tamanho  = tamanho
+        self._livres   = self._nova_fila()
+        self._herdadas = []
+        self._pid      = os.getpid()
+
+    def _nova_fila(self):
+        # a fila limitada torna o "cabe no pool?" atômico entre threads
+        return queue.LifoQueue(maxsize=self._tamanho)
+
+    def _livres_do_processo(self):
+        if self._pid != os.getpid():
+            self._herdadas.append(self._livres)
+            self._livres = self._nova_fila()
+            self._pid    = os.getpid()
+        return self._livres
+
+    def obter(self):
+        livres = self._livres_do_processo()
+        while True:
+            try:
+                conn = livres.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                # a conexão pode ter caído enquanto estava ociosa
+                conn.cursor().execute('SELECT 1').fetchone()
+                return _ConexaoDoPool(conn, self)
+            except Exception:
+                _fechar(conn)
+        return _ConexaoDoPool(self._conectar(), self)
+
+    def devolver(self, conn):
+        """Devolve a conexão ao pool. Retorna False se ela foi fechada."""
+        livres = self._livres_do_processo()
+        try:
+            conn.rollback()
+        except Exception:
+            _fechar(conn)
+            return False
+
+        # maxsize=0 seria uma fila sem limite: pool desativado fecha direto
+        if self._tamanho == 0:
+            _fechar(conn)
+            return False
+
+        try:
+            livres.put_nowait(conn)
+        except queue.Full:
+            _fechar(conn)
+            return False
+        return True
+
+    def encher(self):
+        """Abre conexões em paralelo até completar o pool. Retorna quantas abriu."""
+        livres  = self._livres_do_processo()
+        faltam  = self._tamanho - livres.qsize()
+        abertas = 0
+        if faltam <= 0:
+            return abertas
+
+        with ThreadPoolExecutor(max_workers=faltam) as executor:
+            futuros = [executor.submit(self._conectar) for _ in range(faltam)]
+            for futuro in futuros:
+                try:
+                    conn = futuro.result()
+                except Exception as e:
+                    logger.warning(f'Aquecimento: falha ao conectar no banco: {str(e)}')
+                    continue
+                if self.devolver(conn):
+                    abertas += 1
+        return abertas
+
+
+def get_db_connection():
+    return current_app.extensions['pool_conexoes'].obter()
+
+
+# ============================================
+# Aquecimento do worker
+# ============================================
+
+def aquecer(app):
+    """
+    Prepara o processo antes de ele aceitar requisições: carrega pyodbc e
+    bcrypt, abre `db_pool_aquecer` conexões no pool e faz uma requisição
+    interna para inicializar o roteamento do Flask. Deve rodar no processo
+    que vai atender (worker do gunicorn depois do fork, ou `python api_bi.py`),
+    nunca no master. Cada etapa é independente: falhas são registradas no
+    log e o processo segue a frio naquilo que não foi aquecido.
+    """
+    inicio  = datetime.now()
+    abertas = 0
+
+    try:
+        import pyodbc  # noqa: F401
+        import bcrypt  # noqa: F401
+    except Exception as e:
+        logger.warning(f'Aquecimento: falha ao importar módulos: {str(e)}')
+
+    try:
+        abertas = app.extensions['pool_conexoes'].encher()
+    except Exception as e:
+        logger.warning(f'Aquecimento: falha ao abrir o pool de conexões: {str(e)}')
+
+    try:
+        with app.test_client() as cliente:
+            cliente.get('/health')
+    except Exception as e:
+        logger.warning(f'Aquecimento: falha na requisição interna a /health: {str(e)}')
+
+    duracao = (datetime.now() - inicio).total_seconds()
+    logger.info(f'Processo {os.getpid()} aquecido em {duracao:.2f}s ({abertas} conexões no pool)')
 
 
 # ============================================
@@ -75,7 +354,7 @@ def token_required(f):
         if not token:
             return jsonify({'erro': 'Token não fornecido'}), 401
 
-        if token != BEARER_TOKEN:
+        if token != _config().api_token:
             logger.warning(f'Tentativa de acesso com token inválido de {request.remote_addr}')
             return jsonify({'erro': 'Token inválido'}), 401
 
@@ -90,7 +369,8 @@ def token_required(f):
 
 def executar_atualizacao():
     try:
-        comando = f'schtasks /run /s {SERVIDOR_BI} /tn "{TASK_NAME}"'
+        cfg     = _config()
+        comando = f'schtasks /run /s {cfg.servidor_bi} /tn "{cfg.task_name}"'
         logger.info(f'Executando comando: {comando}')
 
         resultado = subprocess.run(
@@ -120,7 +400,7 @@ def executar_atualizacao():
 # Rotas públicas (sem autenticação)
 # ============================================
 
-@app.route('/', methods=['GET'])
+@api.route('/', methods=['GET'])
 def root():
     return jsonify({
         'nome': 'API de Atualização do Power BI',
@@ -138,7 +418,7 @@ def root():
     }), 200
 
 
-@app.route('/health', methods=['GET'])
+@api.route('/health', methods=['GET'])
 def health():
     return jsonify({
         'status': 'ok',
@@ -147,16 +427,16 @@ def health():
     }), 200
 
 
-@app.route('/status', methods=['GET'])
+@api.route('/status', methods=['GET'])
 def status():
     return jsonify({
-        'servidor': SERVIDOR_BI,
-        'tarefa': TASK_NAME,
+        'servidor': _config().servidor_bi,
+        'tarefa': _config().task_name,
         'timestamp': datetime.now().isoformat()
     }), 200
 
 
-@app.route('/info', methods=['GET'])
+@api.route('/info', methods=['GET'])
 def info():
     return jsonify({
         'nome': 'API de Atualização do Power BI',
@@ -176,8 +456,10 @@ def info():
 # Login
 # ============================================
 
-@app.route('/login', methods=['POST'])
+@api.route('/login', methods=['POST'])
 def login():
+    import bcrypt
+
     dados = request.get_json()
 
     if not dados or 'username' not in dados or 'password' not in dados:
@@ -229,7 +511,7 @@ def login():
 # Rotas protegidas (requerem Bearer Token)
 # ============================================
 
-@app.route('/atualizar-bi', methods=['POST'])
+@api.route('/atualizar-bi', methods=['POST'])
 @token_required
 def atualizar_bi():
     try:
@@ -256,11 +538,11 @@ def atualizar_bi():
         }), 500
 
 
-@app.route('/executar-tarefa/<task_name>', methods=['POST'])
+@api.route('/executar-tarefa/<task_name>', methods=['POST'])
 @token_required
 def executar_tarefa(task_name):
     try:
-        if not all(c.isalnum() or c in '_- ' for c in task_name):
+        if not _nome_tarefa_valido(task_name):
             logger.warning(f'Tentativa de executar tarefa com nome inválido: {task_name}')
             return jsonify({
                 'timestamp': datetime.now().isoformat(),
@@ -271,7 +553,7 @@ def executar_tarefa(task_name):
         ip_cliente = request.remote_addr
         logger.info(f'Requisição para executar tarefa "{task_name}" recebida de {ip_cliente}')
 
-        comando   = f'schtasks /run /s {SERVIDOR_BI} /tn "{task_name}"'
+        comando   = f'schtasks /run /s {_config().servidor_bi} /tn "{task_name}"'
         resultado = subprocess.run(
             comando,
             shell=True,
@@ -315,7 +597,7 @@ def executar_tarefa(task_name):
         }), 500
 
 
-@app.route('/tarefas', methods=['GET'])
+@api.route('/tarefas', methods=['GET'])
 @token_required
 def listar_tarefas():
     tarefas = [
@@ -344,7 +626,7 @@ def listar_tarefas():
 # ============================================================
 
 # GET /usuarios — listar todos
-@app.route('/usuarios', methods=['GET'])
+@api.route('/usuarios', methods=['GET'])
 @token_required
 def listar_usuarios():
     try:
@@ -378,7 +660,7 @@ def listar_usuarios():
 
 
 # GET /usuarios/<username> — buscar um usuário
-@app.route('/usuarios/<username>', methods=['GET'])
+@api.route('/usuarios/<username>', methods=['GET'])
 @token_required
 def buscar_usuario(username):
     try:
@@ -410,9 +692,11 @@ def buscar_usuario(username):
 
 
 # POST /usuarios — criar novo usuário
-@app.route('/usuarios', methods=['POST'])
+@api.route('/usuarios', methods=['POST'])
 @token_required
 def criar_usuario():
+    import bcrypt
+
     dados = request.get_json()
 
     campos = ['username', 'password', 'display_name', 'aplicacoes']
@@ -454,9 +738,11 @@ def criar_usuario():
 
 
 # PUT /usuarios/<username> — editar usuário
-@app.route('/usuarios/<username>', methods=['PUT'])
+@api.route('/usuarios/<username>', methods=['PUT'])
 @token_required
 def editar_usuario(username):
+    import bcrypt
+
     dados = request.get_json()
     if not dados:
         return jsonify({'mensagem': 'Dados inválidos'}), 400
@@ -500,7 +786,7 @@ def editar_usuario(username):
 
 
 # PUT /usuarios/<username>/toggle — alternar ativo/inativo
-@app.route('/usuarios/<username>/toggle', methods=['PUT'])
+@api.route('/usuarios/<username>/toggle', methods=['PUT'])
 @token_required
 def toggle_usuario(username):
     try:
@@ -541,7 +827,7 @@ def toggle_usuario(username):
 # Manipuladores de erro
 # ============================================
 
-@app.errorhandler(404)
+@api.app_errorhandler(404)
 def nao_encontrado(error):
     return jsonify({
         'erro': 'Endpoint não encontrado',
@@ -549,7 +835,7 @@ def nao_encontrado(error):
     }), 404
 
 
-@app.errorhandler(405)
+@api.app_errorhandler(405)
 def metodo_nao_permitido(error):
     return jsonify({
         'erro': 'Método HTTP não permitido',
@@ -558,6 +844,8 @@ def metodo_nao_permitido(error):
 
 
 if __name__ == '__main__':
+    app = create_app()
+    aquecer(app)
     logger.info('Iniciando API de atualização do Power BI')
     app.run(
         host='0.0.0.0',
@@ -0,0 +1,207 @@
+import dataclasses
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+# Configuração
+REPETICOES = 5
+# Se preenchidos, a requisição ao banco medida é POST /login; caso contrário,
+# GET /usuarios com o API_TOKEN do .env. Ambas exigem o banco configurado no .env.
+LOGIN_USUARIO = ''
+LOGIN_SENHA = ''
+# Tempo máximo para o gunicorn responder à primeira requisição
+TIMEOUT_GUNICORN = 60
+
+PASTA_API = os.path.dirname(os.path.abspath(__file__))
+
+
+def requisicao_banco(api_token):
+    """Devolve (método, caminho, corpo, headers) de uma requisição que consulta o banco"""
+    if LOGIN_USUARIO:
+        return 'POST', '/login', {'username': LOGIN_USUARIO, 'password': LOGIN_SENHA}, {}
+    return 'GET', '/usuarios', None, {'Authorization': f'Bearer {api_token}'}
+
+
+def medir_processo(aquecer):
+    """Executado num processo novo: mede import, create_app, aquecimento e 1ª requisição"""
+    t0 = time.perf_counter()
+    import api_bi
+    t_import = time.perf_counter() - t0
+
+    pesados = [m for m in ('pyodbc', 'bcrypt', 'dotenv') if m in sys.modules]
+
+    try:
+        # não escreve as requisições do benchmark no log real do serviço
+        config = dataclasses.replace(api_bi.Configuracao.do_ambiente(), log_arquivo=os.devnull)
+        banco = True
+    except ValueError:
+        config = api_bi.Configuracao(
+            api_token='benchmark', servidor_bi='localhost', task_name='AtualizaBI_TI',
+            db_server='localhost', db_name='benchmark', db_user='benchmark',
+            db_password='benchmark', db_pool_aquecer=0, log_arquivo=os.devnull,
+        )
+        banco = False
+
+    t0 = time.perf_counter()
+    app = api_bi.create_app(config)
+    t_create_app = time.perf_counter() - t0
+
+    t_aquecer = 0.0
+    if aquecer:
+        t0 = time.perf_counter()
+        api_bi.aquecer(app)
+        t_aquecer = time.perf_counter() - t0
+
+    cliente = app.test_client()
+    t0 = time.perf_counter()
+    if banco:
+        metodo, caminho, corpo, headers = requisicao_banco(config.api_token)
+        resposta = cliente.open(caminho, method=metodo, json=corpo, headers=headers)
+    else:
+        resposta = cliente.get('/health')
+    t_primeira = time.perf_counter() - t0
+
+    print(json.dumps({
+        'import': t_import,
+        'create_app': t_create_app,
+        'aquecer': t_aquecer,
+        'primeira_requisicao': t_primeira,
+        'status_primeira': resposta.status_code,
+        'banco_exercitado': banco,
+        'modulos_pesados_no_import': pesados,
+    }))
+
+
+def rodar(aquecer):
+    """Roda REPETICOES processos novos e devolve as medições de cada um"""
+    resultados = []
+    for _ in range(REPETICOES):
+        argumentos = [sys.executable, __file__, '--filho'] + (['--aquecer'] if aquecer else [])
+        saida = subprocess.run(argumentos, cwd=PASTA_API, capture_output=True, text=True, check=True)
+        resultados.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+    return resultados
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def chamar(url, metodo='GET', corpo=None, headers=None):
+    dados = json.dumps(corpo).encode('utf-8') if corpo is not None else None
+    pedido = urllib.request.Request(url, data=dados, method=metodo, headers=dict(headers or {}))
+    if dados is not None:
+        pedido.add_header('Content-Type', 'application/json')
+    try:
+        with urllib.request.urlopen(pedido, timeout=TIMEOUT_GUNICORN) as resposta:
+            return resposta.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def medir_gunicorn(api_token, pool):
+    """
+    Sobe o gunicorn de verdade (1 worker, preload + post_worker_init) e mede o
+    tempo até a primeira resposta e a latência da primeira requisição ao banco
+    """
+    porta = porta_livre()
+    url = f'http://127.0.0.1:{porta}'
+    ambiente = dict(os.environ, DB_POOL_AQUECER=str(pool), LOG_ARQUIVO=os.devnull)
+    argumentos = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                  '--bind', f'127.0.0.1:{porta}', '--workers', '1']
+
+    t0 = time.perf_counter()
+    processo = subprocess.Popen(argumentos, cwd=PASTA_API, env=ambiente,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        # a porta é aberta pelo master; a conexão só é atendida quando o worker estiver pronto
+        while True:
+            if processo.poll() is not None:
+                raise RuntimeError(f'gunicorn encerrou com código {processo.returncode}')
+            if time.perf_counter() - t0 > TIMEOUT_GUNICORN:
+                raise RuntimeError('gunicorn não respondeu a tempo')
+            try:
+                chamar(f'{url}/health')
+                break
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        t_boot = time.perf_counter() - t0
+
+        metodo, caminho, corpo, headers = requisicao_banco(api_token)
+        t0 = time.perf_counter()
+        status = chamar(f'{url}{caminho}', metodo, corpo, headers)
+        t_banco = time.perf_counter() - t0
+    finally:
+        processo.terminate()
+        processo.wait()
+
+    return {'boot_ate_primeira_resposta': t_boot, 'primeira_requisicao_banco': t_banco,
+            'status_banco': status}
+
+
+def imprimir(titulo, resultados):
+    print(f"\n=== {titulo} ===")
+    for chave, valor in resultados[0].items():
+        if not isinstance(valor, float):
+            continue
+        valores = [r[chave] * 1000 for r in resultados]
+        print(f"{chave:<28} mediana {statistics.median(valores):8.1f} ms   "
+              f"min {min(valores):8.1f} ms   max {max(valores):8.1f} ms")
+    for chave in ('status_primeira', 'status_banco'):
+        if chave in resultados[0]:
+            print(f"{chave:<28} {sorted({r[chave] for r in resultados})}")
+    if 'modulos_pesados_no_import' in resultados[0]:
+        print(f"Módulos pesados após o import: {resultados[0]['modulos_pesados_no_import'] or 'nenhum'}")
+
+
+if __name__ == '__main__':
+    if '--filho' in sys.argv:
+        medir_processo('--aquecer' in sys.argv)
+        sys.exit(0)
+
+    sys.path.insert(0, PASTA_API)
+    import api_bi
+
+    try:
+        config = api_bi.Configuracao.do_ambiente()
+    except ValueError as e:
+        config = None
+        erro_config = str(e)
+
+    print("=" * 50)
+    print("BENCHMARK DE INICIALIZAÇÃO DA API")
+    if config:
+        metodo, caminho, _, _ = requisicao_banco(config.api_token)
+        print(f"{REPETICOES} processos por cenário | requisição ao banco: {metodo} {caminho}")
+    else:
+        print(f"ATENÇÃO: {erro_config}")
+        print("O banco NÃO será exercitado: a 1ª requisição em processo é GET /health,")
+        print("então os cenários com e sem aquecimento medem quase a mesma coisa,")
+        print("e os cenários com gunicorn serão pulados.")
+    print("=" * 50)
+
+    imprimir('Em processo (test_client) — sem aquecimento', rodar(aquecer=False))
+    imprimir('Em processo (test_client) — com aquecimento', rodar(aquecer=True))
+
+    if config:
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            print("\ngunicorn não instalado: cenários com gunicorn pulados.")
+        else:
+            pool = config.db_pool_aquecer or 2
+            for titulo, tamanho in (('sem aquecimento (DB_POOL_AQUECER=0)', 0),
+                                    (f'com aquecimento (DB_POOL_AQUECER={pool})', pool)):
+                resultados = [medir_gunicorn(config.api_token, tamanho) for _ in range(REPETICOES)]
+                imprimir(f'Gunicorn — {titulo}', resultados)
+
+    print("\n" + "=" * 50)
+    print("BENCHMARK CONCLUÍDO")
+    print("=" * 50)
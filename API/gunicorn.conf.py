@@ -0,0 +1,35 @@
+# ============================================
+# Configuração do Gunicorn
+# Uso: gunicorn -c gunicorn.conf.py
+# ============================================
+
+wsgi_app = 'api_bi:create_app()'
+bind     = '0.0.0.0:5000'
+workers  = 4
+
+# A aplicação é criada uma única vez no master; os workers herdam os módulos
+# já carregados no fork e reiniciam sem pagar o custo de import.
+preload_app = True
+
+
+def on_starting(server):
+    # api_bi importa pyodbc e bcrypt sob demanda; importá-los aqui, no master,
+    # faz com que os workers já nasçam com eles carregados. Importar é seguro
+    # antes do fork — só as conexões precisam ser abertas em cada worker.
+    import pyodbc  # noqa: F401
+    import bcrypt  # noqa: F401
+
+
+def post_worker_init(worker):
+    # Roda em cada worker, depois do fork e antes de aceitar requisições.
+    # As conexões precisam ser abertas aqui (e não no master) para não
+    # serem compartilhadas entre processos; o aquecimento abre o pool de
+    # conexões e faz a requisição interna a /health.
+    #
+    # O heartbeat do worker só começa depois deste hook: qualquer falha aqui
+    # é registrada e o worker segue a frio, em vez de morrer e reiniciar em loop.
+    try:
+        from api_bi import aquecer
+        aquecer(worker.wsgi)
+    except Exception:
+        worker.log.exception('Falha no aquecimento do worker; iniciando a frio')
@@ -0,0 +1,226 @@
+import dataclasses
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import dotenv
+import pytest
+
+import api_bi
+
+
+PASTA_API = os.path.dirname(os.path.abspath(__file__))
+
+
+def configuracao(**alteracoes):
+    valores = dict(
+        api_token='token-de-teste', servidor_bi='192.168.0.210', task_name='AtualizaBI_TI',
+        db_server='localhost', db_name='powerbi_usuarios', db_user='usuario', db_password='senha',
+        db_pool_aquecer=0,
+    )
+    valores.update(alteracoes)
+    return api_bi.Configuracao(**valores)
+
+
+@pytest.fixture
+def cliente(tmp_path):
+    app = api_bi.create_app(configuracao(log_arquivo=str(tmp_path / 'api_bi.log')))
+    return app.test_client()
+
+
+def test_create_app_usa_configuracao_explicita(cliente):
+    resposta = cliente.get('/status')
+
+    assert resposta.status_code == 200
+    assert resposta.get_json()['servidor'] == '192.168.0.210'
+    assert resposta.get_json()['tarefa'] == 'AtualizaBI_TI'
+
+
+def test_token_da_configuracao_protege_rotas(cliente):
+    assert cliente.get('/tarefas').status_code == 401
+    assert cliente.get('/tarefas', headers={'Authorization': 'Bearer outro'}).status_code == 401
+    assert cliente.get('/tarefas', headers={'Authorization': 'Bearer token-de-teste'}).status_code == 200
+
+
+def test_configuracao_valida():
+    cfg = configuracao(db_pool_aquecer=api_bi.DB_POOL_MAXIMO)
+
+    assert cfg.db_pool_aquecer == api_bi.DB_POOL_MAXIMO
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        cfg.api_token = 'outro'
+
+
+@pytest.mark.parametrize('tarefa', ['AtualizaBI_TI', '\\AtualizaBI_TI', '\\Pasta\\AtualizaBI_TI'])
+def test_configuracao_aceita_tarefa_em_pasta(tarefa):
+    assert configuracao(task_name=tarefa).task_name == tarefa
+
+
+@pytest.mark.parametrize('tarefa', ['AtualizaBI"&calc', 'AtualizaBI_TI%5C'])
+def test_executar_tarefa_rejeita_nome_invalido(cliente, tarefa):
+    resposta = cliente.post(f'/executar-tarefa/{tarefa}',
+                            headers={'Authorization': 'Bearer token-de-teste'})
+
+    assert resposta.status_code == 400
+
+
+@pytest.mark.parametrize('alteracoes', [
+    {'api_token': ''},
+    {'servidor_bi': '192.168.0.210 & del *'},
+    {'task_name': 'AtualizaBI"; shutdown'},
+    {'task_name': 'AtualizaBI_TI\\'},
+    {'task_name': '\\Pasta\\\\AtualizaBI_TI'},
+    {'db_server': ''},
+    {'db_password': ''},
+    {'db_pool_aquecer': -1},
+    {'db_pool_aquecer': api_bi.DB_POOL_MAXIMO + 1},
+    {'db_pool_aquecer': True},
+    {'db_pool_aquecer': '2'},
+])
+def test_configuracao_invalida(alteracoes):
+    with pytest.raises(ValueError):
+        configuracao(**alteracoes)
+
+
+def test_do_ambiente_rejeita_pool_nao_numerico(monkeypatch):
+    # não deixa um .env local vazar para os.environ no resto da sessão
+    monkeypatch.setattr(dotenv, 'load_dotenv', lambda *args, **kwargs: False)
+    monkeypatch.setenv('DB_POOL_AQUECER', 'muitas')
+
+    with pytest.raises(ValueError):
+        api_bi.Configuracao.do_ambiente()
+
+
+@pytest.mark.parametrize('timeout', [0, api_bi.DB_TIMEOUT_MAXIMO + 1, True])
+def test_configuracao_rejeita_timeout_invalido(timeout):
+    with pytest.raises(ValueError):
+        configuracao(db_timeout_conexao=timeout)
+
+
+class CursorFalso:
+    def __init__(self):
+        self.fechado = False
+
+    def execute(self, sql):
+        return self
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        self.fechado = True
+
+
+class ConexaoFalsa:
+    def __init__(self):
+        self.fechada = False
+        self.caiu    = False
+
+    def cursor(self):
+        if self.caiu:
+            raise RuntimeError('conexão perdida')
+        return CursorFalso()
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.fechada = True
+
+
+def test_pool_reaproveita_conexao_devolvida():
+    criadas = []
+    pool = api_bi.PoolConexoes(lambda: criadas.append(ConexaoFalsa()) or criadas[-1], tamanho=1)
+
+    pool.obter().close()
+    pool.obter().close()
+
+    assert len(criadas) == 1
+    assert not criadas[0].fechada
+
+
+def test_pool_fecha_cursores_antes_de_devolver_conexao():
+    pool = api_bi.PoolConexoes(ConexaoFalsa, tamanho=1)
+
+    conn   = pool.obter()
+    cursor = conn.cursor()
+    conn.close()
+
+    assert cursor.fechado
+
+
+def test_pool_fecha_excedentes_e_descarta_conexoes_caidas():
+    criadas = []
+    pool = api_bi.PoolConexoes(lambda: criadas.append(ConexaoFalsa()) or criadas[-1], tamanho=1)
+
+    primeira, segunda = pool.obter(), pool.obter()
+    primeira.close()
+    segunda.close()
+    assert criadas[1].fechada
+
+    criadas[0].caiu = True
+    pool.obter()
+    assert criadas[0].fechada
+    assert len(criadas) == 3
+
+
+def test_pool_nao_passa_do_tamanho_com_devolucoes_concorrentes():
+    criadas = []
+    pool = api_bi.PoolConexoes(lambda: criadas.append(ConexaoFalsa()) or criadas[-1], tamanho=2)
+    emprestadas = [pool.obter() for _ in range(8)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda conn: conn.close(), emprestadas))
+
+    assert sum(not conn.fechada for conn in criadas) == 2
+
+
+def test_pool_desativado_fecha_conexoes_devolvidas():
+    pool = api_bi.PoolConexoes(ConexaoFalsa, tamanho=0)
+    conn = ConexaoFalsa()
+
+    assert not pool.devolver(conn)
+    assert conn.fechada
+
+
+def test_pool_nao_reaproveita_nem_fecha_conexoes_de_antes_do_fork(monkeypatch):
+    criadas = []
+    pool = api_bi.PoolConexoes(lambda: criadas.append(ConexaoFalsa()) or criadas[-1], tamanho=1)
+    pool.obter().close()
+
+    monkeypatch.setattr(api_bi.os, 'getpid', lambda: -1)
+    pool.obter().close()
+
+    assert len(criadas) == 2
+    assert not criadas[0].fechada
+
+
+def test_pool_encher_ignora_falhas_de_conexao():
+    def conectar():
+        raise RuntimeError('banco fora do ar')
+
+    assert api_bi.PoolConexoes(conectar, tamanho=2).encher() == 0
+
+
+def test_aquecer_nao_propaga_falhas_de_conexao(tmp_path, monkeypatch, caplog):
+    def conectar(cfg):
+        raise RuntimeError('banco fora do ar')
+
+    monkeypatch.setattr(api_bi, '_conectar', conectar)
+    app = api_bi.create_app(configuracao(db_pool_aquecer=2, log_arquivo=str(tmp_path / 'api_bi.log')))
+
+    with caplog.at_level('WARNING', logger='api_bi'):
+        api_bi.aquecer(app)
+
+    assert app.extensions['pool_conexoes']._livres.empty()
+    assert 'falha ao conectar no banco: banco fora do ar' in caplog.text
+
+
+def test_import_nao_carrega_modulos_pesados():
+    # processo novo: no processo do pytest outros testes podem já ter importado os módulos
+    codigo = ('import sys, api_bi; '
+              'print(",".join(m for m in ("pyodbc", "bcrypt", "dotenv") if m in sys.modules))')
+    saida = subprocess.run([sys.executable, '-c', codigo], cwd=PASTA_API,
+                           capture_output=True, text=True, check=True)
+
+    assert saida.stdout.strip() == ''